@@ -18,6 +18,21 @@ IN4_PIN = 13  # Physical pin 22 (GPIO2_D4)
 
 STOP_BTN_PIN = 6  # Physical pin 12 (CAN2_TX)
 
+# Kernel GPIO numbers (GPIO column of `gpio readall`) used by the libgpiod
+# backend. RK3588 exposes one gpiochip per 32-line bank, so GPIO n is line
+# n % 32 on /dev/gpiochip{n // 32}.
+GPIO_LINE_NUMBERS = {
+    ENA_PIN: 54,
+    IN1_PIN: 138,
+    IN2_PIN: 139,
+    ENB_PIN: 35,
+    IN3_PIN: 28,
+    IN4_PIN: 92,
+    STOP_BTN_PIN: 29,
+}
+
+GPIO_LINES_PER_CHIP = 32
+
 MOTOR_A_DIRECTION = (1, 0)  # (IN1, IN2)
 MOTOR_B_DIRECTION = (1, 0)  # (IN3, IN4)
 
@@ -27,6 +42,13 @@ DEFAULT_DUTY = 100
 
 PWM_FREQUENCY = 500
 
+# Enable pins driven by a SoC PWM block instead of software PWM, as
+# pin -> (pwmchip, channel) under /sys/class/pwm. ENA (PWM15) and ENB (PWM1)
+# are PWM-capable once their overlay is enabled; check `ls /sys/class/pwm`
+# for the chip numbers, e.g. {ENA_PIN: (3, 0), ENB_PIN: (0, 0)}.
+# Listed pins are not claimed as GPIO outputs.
+HARDWARE_PWM_CHANNELS: dict[int, tuple[int, int]] = {}
+
 BUTTON_DEBOUNCE_TIME = 0.05
 
 API_HOST = "0.0.0.0"
@@ -34,4 +56,4 @@ API_PORT = 8088
 
 DATABASE_PATH = "data/kalembang.db"
 
-GPIO_BACKEND = "wiringop"
+GPIO_BACKEND = "gpiod"  # "gpiod" (falls back to wiringOP if its lines can't be requested) or "wiringop"
@@ -4,19 +4,96 @@ Kalembang Database Layer (sqlite3)
 Handles alarm persistence with sqlite3 (compatible with libsql).
 """
 
+import os
+import queue
 import sqlite3
 import logging
+import threading
+from collections import defaultdict
+from concurrent.futures import Future
 from pathlib import Path
-from datetime import datetime
-from typing import Optional
-from dataclasses import dataclass, asdict
+from datetime import datetime, timedelta
+from typing import Any, Callable, Optional, TypeVar
+from dataclasses import dataclass
+
+import orjson
 
 from .config import DATABASE_PATH
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+_WorkItem = tuple[Callable[..., Any], tuple, Future]
+
+_DAY_BY_WEEKDAY = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+# Days are stored as a 7-bit mask, bit n set = rings on weekday n (Monday=0).
+ALL_DAYS_MASK = 0x7F
+
+_DAY_MASK_BY_NAME = {name: 1 << i for i, name in enumerate(_DAY_BY_WEEKDAY)}
+
+_DAYS_MASK_BY_PRESET = {
+    "daily": ALL_DAYS_MASK,
+    "everyday": ALL_DAYS_MASK,
+    "once": ALL_DAYS_MASK,
+    "weekdays": 0x1F,
+    "weekends": 0x60,
+}
+
+
+def days_to_mask(days: str) -> int:
+    """Convert a days string ("daily", "weekdays", "mon,wed", ...) to a weekday bitmask."""
+    preset = _DAYS_MASK_BY_PRESET.get(days)
+    if preset is not None:
+        return preset
+    mask = 0
+    for part in days.split(","):
+        mask |= _DAY_MASK_BY_NAME.get(part.strip().lower(), 0)
+    return mask
+
+BUSY_TIMEOUT_MS = 5000
+
+# Applied to every connection after WAL is enabled.
+_CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}",
+    "PRAGMA cache_size=-20000",  # 20 MB
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA foreign_keys=ON",
+    "PRAGMA mmap_size=268435456",  # 256 MB
+)
+
+# Statements are kept as module constants so every call passes the same
+# string and hits the connection's prepared-statement cache.
+STATEMENT_CACHE_SIZE = 256
+
+_SQL_INSERT_ALARM = """
+    INSERT INTO alarms (name, hour, minute, second, clock_id, enabled, days, duration, mode, pattern, days_mask, once_flag)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+_SQL_INSERT_ALARM_RETURNING = _SQL_INSERT_ALARM + "RETURNING id, created_at"
+_SQL_MAX_ALARM_ID = "SELECT COALESCE(MAX(id), 0) FROM alarms"
+_SQL_SELECT_CREATED_SINCE = "SELECT id, created_at FROM alarms WHERE id > ? ORDER BY id"
+_SQL_SELECT_ALARM = "SELECT * FROM alarms WHERE id = ?"
+_SQL_SELECT_ALL_ALARMS = "SELECT * FROM alarms ORDER BY hour, minute, second"
+_SQL_SELECT_ENABLED_ALARMS = (
+    "SELECT * FROM alarms WHERE enabled = 1 ORDER BY hour, minute, second"
+)
+_SQL_UPDATE_ALARM = """
+    UPDATE alarms SET
+        name = ?, hour = ?, minute = ?, second = ?,
+        clock_id = ?, enabled = ?, days = ?, duration = ?,
+        mode = ?, pattern = ?, days_mask = ?, once_flag = ?
+    WHERE id = ?
+"""
+_SQL_DELETE_ALARM = "DELETE FROM alarms WHERE id = ?"
+_SQL_SET_ENABLED = "UPDATE alarms SET enabled = ? WHERE id = ?"
+_SQL_MARK_TRIGGERED = "UPDATE alarms SET last_triggered = datetime('now') WHERE id = ?"
+_SQL_DISABLE_ONCE = "UPDATE alarms SET enabled = 0 WHERE id = ? AND once_flag = 1"
+
 
-@dataclass
+@dataclass(slots=True)
 class Alarm:
     """Alarm data model."""
 
@@ -35,12 +112,28 @@ class Alarm:
     pattern: Optional[str] = None  # JSON pattern data when mode="pattern"
     created_at: Optional[str] = None
     last_triggered: Optional[str] = None
+    days_mask: Optional[int] = None  # Derived from days when not loaded from the DB
 
-    def to_dict(self) -> dict:
-        return asdict(self)
+    def __post_init__(self) -> None:
+        if self.days_mask is None:
+            self.days_mask = days_to_mask(self.days)
 
-    WEEKDAY_SET = {"mon", "tue", "wed", "thu", "fri"}
-    WEEKEND_SET = {"sat", "sun"}
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "hour": self.hour,
+            "minute": self.minute,
+            "second": self.second,
+            "clock_id": self.clock_id,
+            "enabled": self.enabled,
+            "days": self.days,
+            "duration": self.duration,
+            "mode": self.mode,
+            "pattern": self.pattern,
+            "created_at": self.created_at,
+            "last_triggered": self.last_triggered,
+        }
 
     def matches_time(self, now: datetime) -> bool:
         """Check if this alarm should trigger at the given time."""
@@ -54,20 +147,98 @@ class Alarm:
         ):
             return False
 
-        day_map = {0: "mon", 1: "tue", 2: "wed", 3: "thu", 4: "fri", 5: "sat", 6: "sun"}
-        current_day = day_map[now.weekday()]
+        return bool(self.days_mask & (1 << now.weekday()))
 
-        if self.days in ("daily", "everyday"):
-            return True
-        elif self.days == "once":
-            return True
-        elif self.days == "weekdays":
-            return current_day in self.WEEKDAY_SET
-        elif self.days == "weekends":
-            return current_day in self.WEEKEND_SET
-        else:
-            allowed_days = [d.strip().lower() for d in self.days.split(",")]
-            return current_day in allowed_days
+    def next_fire_time(self, now: datetime) -> Optional[datetime]:
+        """
+        Get the first time at or after `now` (to the second) this alarm rings.
+
+        Returns None when the alarm is disabled or rings on no day.
+        """
+        if not self.enabled or not self.days_mask:
+            return None
+        candidate = now.replace(
+            hour=self.hour, minute=self.minute, second=self.second, microsecond=0
+        )
+        if candidate < now.replace(microsecond=0):
+            candidate += timedelta(days=1)
+        while not self.days_mask & (1 << candidate.weekday()):
+            candidate += timedelta(days=1)
+        return candidate
+
+
+def _run_in_transaction(conn: sqlite3.Connection, fn: Callable[..., T], *args: Any) -> T:
+    """Run fn(conn, *args) inside BEGIN IMMEDIATE, rolling back on error."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        result = fn(conn, *args)
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+    return result
+
+
+class DBWorker(threading.Thread):
+    """
+    Thread that owns the writer connection.
+
+    Writes are submitted as (callable, args, future) items on a queue and run
+    one at a time on this thread, so the connection never crosses threads.
+    """
+
+    def __init__(self, connect: Callable[[], sqlite3.Connection]):
+        super().__init__(name="kalembang-db-writer", daemon=True)
+        self._connect = connect
+        # None is the shutdown sentinel.
+        self._queue: queue.Queue[Optional[_WorkItem]] = queue.Queue()
+        self._ready = threading.Event()
+        self._error: Optional[BaseException] = None
+
+    def run(self) -> None:
+        try:
+            conn = self._connect()
+        except BaseException as e:
+            self._error = e
+            self._ready.set()
+            return
+        self._ready.set()
+
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    break
+                fn, args, future = item
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    future.set_result(fn(conn, *args))
+                except BaseException as e:
+                    future.set_exception(e)
+        finally:
+            conn.close()
+
+    def wait_ready(self) -> None:
+        """Block until the connection is open, re-raising any connect error."""
+        self._ready.wait()
+        if self._error is not None:
+            raise self._error
+
+    def submit(self, fn: Callable[..., T], *args: Any) -> "Future[T]":
+        """Queue fn(conn, *args) to run on the writer thread."""
+        future: Future[T] = Future()
+        self._queue.put((fn, args, future))
+        return future
+
+    def call(self, fn: Callable[..., T], *args: Any) -> T:
+        """Run fn(conn, *args) on the writer thread and wait for the result."""
+        return self.submit(fn, *args).result()
+
+    def stop(self) -> None:
+        """Finish queued work, close the connection and join the thread."""
+        self._queue.put(None)
+        self.join()
 
 
 class Database:
@@ -75,19 +246,129 @@ class Database:
 
     def __init__(self, db_path: str = DATABASE_PATH):
         self.db_path = db_path
-        self._conn: Optional[sqlite3.Connection] = None
+        self._worker: Optional[DBWorker] = None
+        self._readers: queue.Queue[sqlite3.Connection] = queue.Queue()
+        self._reader_conns: list[sqlite3.Connection] = []
+
+        # Enabled alarms and the (hour, minute, second) -> alarms index built
+        # from them. Both are rebuilt lazily after any write to the alarms
+        # table.
+        self._enabled_cache: Optional[list[Alarm]] = None
+        self._time_index: Optional[dict[tuple[int, int, int], list[Alarm]]] = None
+        self._all_alarms_json: Optional[bytes] = None
+        self._cache_lock = threading.Lock()
+        self._connect_lock = threading.Lock()
+
+    def __enter__(self) -> "Database":
+        self.connect()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    @property
+    def _is_memory(self) -> bool:
+        return self.db_path == ":memory:"
 
     def connect(self) -> None:
-        """Connect to the database and initialize schema."""
+        """Connect to the database and initialize schema. No-op if already connected."""
+        with self._connect_lock:
+            if self._worker is not None:
+                return
+            self._connect()
+
+    def _connect(self) -> None:
         Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
 
-        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        worker = DBWorker(lambda: self._open_connection(self.db_path))
+        worker.start()
+        worker.wait_ready()
+        self._worker = worker
         self._init_schema()
-        logger.info(f"Database connected: {self.db_path}")
+
+        # An in-memory database is private to its connection, so reads
+        # have to go through the writer thread as well.
+        if not self._is_memory:
+            reader_uri = f"{Path(self.db_path).resolve().as_uri()}?mode=ro"
+            for _ in range(os.cpu_count() or 1):
+                conn = self._open_connection(
+                    reader_uri, uri=True, check_same_thread=False
+                )
+                self._reader_conns.append(conn)
+                self._readers.put(conn)
+
+        logger.info(
+            "Database connected: %s (%d readers)", self.db_path, len(self._reader_conns)
+        )
+
+    def _open_connection(
+        self, database: str, uri: bool = False, check_same_thread: bool = True
+    ) -> sqlite3.Connection:
+        """Open a connection with WAL and the tuning PRAGMAs applied."""
+        # isolation_level=None puts the driver in autocommit mode; writes open
+        # their own BEGIN IMMEDIATE transaction via _write().
+        conn = sqlite3.connect(
+            database,
+            timeout=BUSY_TIMEOUT_MS / 1000,
+            isolation_level=None,
+            check_same_thread=check_same_thread,
+            cached_statements=STATEMENT_CACHE_SIZE,
+            uri=uri,
+        )
+        conn.row_factory = sqlite3.Row
+        self._enable_wal(conn)
+        for pragma in _CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def _enable_wal(self, conn: sqlite3.Connection) -> None:
+        """Switch the database file to WAL so readers don't block the writer."""
+        if self._is_memory:
+            return
+
+        row = conn.execute("PRAGMA journal_mode=WAL").fetchone()
+        if row is None or row[0].lower() != "wal":
+            logger.warning("Could not enable WAL journal mode (got %s)", row)
+
+    def _require_worker(self) -> DBWorker:
+        """Return the writer thread, raising instead of blocking when not connected."""
+        worker = self._worker
+        if worker is None:
+            raise sqlite3.ProgrammingError(f"Database is not connected: {self.db_path}")
+        return worker
+
+    def _write(self, fn: Callable[..., T], *args: Any) -> T:
+        """
+        Run fn(conn, *args) on the writer thread inside BEGIN IMMEDIATE.
+
+        Taking the write lock up front avoids the deferred read->write
+        upgrade that can fail with SQLITE_BUSY under concurrent access.
+        """
+        return self._require_worker().call(_run_in_transaction, fn, *args)
+
+    def _read(self, fn: Callable[..., T], *args: Any) -> T:
+        """Run fn(conn, *args) on a read-only connection borrowed from the pool."""
+        worker = self._require_worker()
+        if self._is_memory:
+            return worker.call(fn, *args)
+
+        conn = self._readers.get()
+        try:
+            return fn(conn, *args)
+        finally:
+            self._readers.put(conn)
 
     def _init_schema(self) -> None:
         """Initialize database schema."""
-        self._conn.execute("""
+        self._write(self._create_schema)
+        self._write(self._migrate_schema)
+
+        # Refresh planner statistics so get_enabled_alarms uses the index.
+        self._write(lambda conn: conn.execute("ANALYZE"))
+
+    @staticmethod
+    def _create_schema(conn: sqlite3.Connection) -> None:
+        conn.execute("""
             CREATE TABLE IF NOT EXISTS alarms (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 name TEXT NOT NULL,
@@ -101,74 +382,105 @@ class Database:
                 mode TEXT NOT NULL DEFAULT 'clock1' CHECK(mode IN ('clock1', 'clock2', 'pattern')),
                 pattern TEXT,
                 created_at TEXT NOT NULL DEFAULT (datetime('now')),
-                last_triggered TEXT
+                last_triggered TEXT,
+                days_mask INTEGER NOT NULL DEFAULT 127,
+                once_flag INTEGER NOT NULL DEFAULT 0
             )
         """)
-        self._conn.commit()
-        self._migrate_schema()
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_alarms_enabled_time "
+            "ON alarms(enabled, hour, minute, second)"
+        )
 
-    def _migrate_schema(self) -> None:
+    @staticmethod
+    def _migrate_schema(conn: sqlite3.Connection) -> None:
         """Run database migrations for new columns."""
-        cursor = self._conn.execute("PRAGMA table_info(alarms)")
+        cursor = conn.execute("PRAGMA table_info(alarms)")
         columns = [row[1] for row in cursor.fetchall()]
 
         if "mode" not in columns:
-            self._conn.execute(
+            conn.execute(
                 "ALTER TABLE alarms ADD COLUMN mode TEXT NOT NULL DEFAULT 'clock1'"
             )
             logger.info("Added 'mode' column to alarms table")
 
         if "pattern" not in columns:
-            self._conn.execute("ALTER TABLE alarms ADD COLUMN pattern TEXT")
+            conn.execute("ALTER TABLE alarms ADD COLUMN pattern TEXT")
             logger.info("Added 'pattern' column to alarms table")
 
-        self._conn.commit()
+        if "days_mask" not in columns:
+            conn.execute(
+                "ALTER TABLE alarms ADD COLUMN days_mask INTEGER NOT NULL DEFAULT 127"
+            )
+            conn.execute(
+                "ALTER TABLE alarms ADD COLUMN once_flag INTEGER NOT NULL DEFAULT 0"
+            )
+            rows = conn.execute("SELECT id, days FROM alarms").fetchall()
+            conn.executemany(
+                "UPDATE alarms SET days_mask = ?, once_flag = ? WHERE id = ?",
+                [(days_to_mask(days), int(days == "once"), alarm_id) for alarm_id, days in rows],
+            )
+            logger.info("Added 'days_mask' and 'once_flag' columns to alarms table")
 
     def close(self) -> None:
-        """Close the database connection."""
-        if self._conn:
-            self._conn.close()
-            self._conn = None
+        """Stop the writer thread and close all pooled reader connections."""
+        with self._connect_lock:
+            for conn in self._reader_conns:
+                conn.close()
+            self._reader_conns.clear()
+            self._readers = queue.Queue()
+
+            if self._worker:
+                self._worker.stop()
+                self._worker = None
+            self._invalidate_caches()
 
     def create_alarm(self, alarm: Alarm) -> Alarm:
         """Create a new alarm."""
-        cursor = self._conn.execute(
-            """
-            INSERT INTO alarms (name, hour, minute, second, clock_id, enabled, days, duration, mode, pattern)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """,
-            (
-                alarm.name,
-                alarm.hour,
-                alarm.minute,
-                alarm.second,
-                alarm.clock_id,
-                int(alarm.enabled),
-                alarm.days,
-                alarm.duration,
-                alarm.mode,
-                alarm.pattern,
-            ),
+        rows = self._write(
+            lambda conn: conn.execute(
+                _SQL_INSERT_ALARM_RETURNING, self._alarm_values(alarm)
+            ).fetchall()
         )
-        self._conn.commit()
+        self._invalidate_caches()
 
-        alarm.id = cursor.lastrowid
+        alarm.id, alarm.created_at = rows[0]
+        self._log_created(alarm)
+        return alarm
+
+    def create_alarms_bulk(self, alarms: list[Alarm]) -> list[Alarm]:
+        """Create several alarms in a single transaction."""
+        if not alarms:
+            return alarms
+
+        def insert(conn: sqlite3.Connection) -> list[tuple[int, str]]:
+            last_id = conn.execute(_SQL_MAX_ALARM_ID).fetchone()[0]
+            conn.executemany(
+                _SQL_INSERT_ALARM, [self._alarm_values(alarm) for alarm in alarms]
+            )
+            return conn.execute(_SQL_SELECT_CREATED_SINCE, (last_id,)).fetchall()
+
+        rows = self._write(insert)
+        self._invalidate_caches()
 
-        row = self._conn.execute(
-            "SELECT created_at FROM alarms WHERE id = ?", (alarm.id,)
-        ).fetchone()
-        alarm.created_at = row[0] if row else None
+        for alarm, (alarm_id, created_at) in zip(alarms, rows):
+            alarm.id = alarm_id
+            alarm.created_at = created_at
+            self._log_created(alarm)
+        return alarms
 
+    @staticmethod
+    def _log_created(alarm: Alarm) -> None:
         logger.info(
-            f"Created alarm: {alarm.name} at {alarm.hour:02d}:{alarm.minute:02d}:{alarm.second:02d} (mode={alarm.mode})"
+            "Created alarm: %s at %02d:%02d:%02d (mode=%s)",
+            alarm.name, alarm.hour, alarm.minute, alarm.second, alarm.mode,
         )
-        return alarm
 
     def get_alarm(self, alarm_id: int) -> Optional[Alarm]:
         """Get an alarm by ID."""
-        row = self._conn.execute(
-            "SELECT * FROM alarms WHERE id = ?", (alarm_id,)
-        ).fetchone()
+        row = self._read(
+            lambda conn: conn.execute(_SQL_SELECT_ALARM, (alarm_id,)).fetchone()
+        )
 
         if row:
             return self._row_to_alarm(row)
@@ -176,117 +488,187 @@ class Database:
 
     def get_all_alarms(self) -> list[Alarm]:
         """Get all alarms."""
-        rows = self._conn.execute(
-            "SELECT * FROM alarms ORDER BY hour, minute, second"
-        ).fetchall()
+        rows = self._read(lambda conn: conn.execute(_SQL_SELECT_ALL_ALARMS).fetchall())
         return [self._row_to_alarm(row) for row in rows]
 
+    def get_all_alarms_json(self) -> bytes:
+        """Get all alarms as the API's JSON list (cached until the next write)."""
+        with self._cache_lock:
+            if self._all_alarms_json is None:
+                self._all_alarms_json = orjson.dumps(
+                    [alarm.to_dict() for alarm in self.get_all_alarms()]
+                )
+            return self._all_alarms_json
+
     def get_enabled_alarms(self) -> list[Alarm]:
-        """Get all enabled alarms."""
-        rows = self._conn.execute(
-            "SELECT * FROM alarms WHERE enabled = 1 ORDER BY hour, minute, second"
-        ).fetchall()
-        return [self._row_to_alarm(row) for row in rows]
+        """Get all enabled alarms (served from cache until the next write)."""
+        with self._cache_lock:
+            return list(self._cached_enabled_alarms())
+
+    def _cached_enabled_alarms(self) -> list[Alarm]:
+        """Return the enabled-alarm cache, loading it if needed. Caller holds _cache_lock."""
+        if self._enabled_cache is None:
+            rows = self._read(
+                lambda conn: conn.execute(_SQL_SELECT_ENABLED_ALARMS).fetchall()
+            )
+            self._enabled_cache = [self._row_to_alarm(row) for row in rows]
+        return self._enabled_cache
+
+    def get_alarms_at(self, now: datetime) -> list[Alarm]:
+        """Get the enabled alarms that should trigger at the given time."""
+        day_bit = 1 << now.weekday()
+        return [
+            alarm
+            for alarm in self.alarms_at(now.hour, now.minute, now.second)
+            if alarm.days_mask & day_bit
+        ]
+
+    def alarms_at(self, hour: int, minute: int, second: int) -> list[Alarm]:
+        """Get the enabled alarms set for a time of day, on any weekday."""
+        with self._cache_lock:
+            if self._time_index is None:
+                self._time_index = self._build_time_index()
+            return self._time_index.get((hour, minute, second), [])
+
+    def _build_time_index(self) -> dict[tuple[int, int, int], list[Alarm]]:
+        """Index enabled alarms by (hour, minute, second). Caller holds _cache_lock."""
+        index: dict[tuple[int, int, int], list[Alarm]] = defaultdict(list)
+        for alarm in self._cached_enabled_alarms():
+            index[(alarm.hour, alarm.minute, alarm.second)].append(alarm)
+        return dict(index)
+
+    def _invalidate_caches(self) -> None:
+        with self._cache_lock:
+            self._enabled_cache = None
+            self._time_index = None
+            self._all_alarms_json = None
 
     def update_alarm(self, alarm: Alarm) -> Optional[Alarm]:
         """Update an existing alarm."""
         if alarm.id is None:
             return None
 
-        self._conn.execute(
-            """
-            UPDATE alarms SET
-                name = ?, hour = ?, minute = ?, second = ?,
-                clock_id = ?, enabled = ?, days = ?, duration = ?,
-                mode = ?, pattern = ?
-            WHERE id = ?
-        """,
-            (
-                alarm.name,
-                alarm.hour,
-                alarm.minute,
-                alarm.second,
-                alarm.clock_id,
-                int(alarm.enabled),
-                alarm.days,
-                alarm.duration,
-                alarm.mode,
-                alarm.pattern,
-                alarm.id,
-            ),
+        self._write(
+            lambda conn: conn.execute(
+                _SQL_UPDATE_ALARM, (*self._alarm_values(alarm), alarm.id)
+            )
         )
-        self._conn.commit()
+        self._invalidate_caches()
 
-        logger.info(f"Updated alarm {alarm.id}: {alarm.name} (mode={alarm.mode})")
+        logger.info("Updated alarm %d: %s (mode=%s)", alarm.id, alarm.name, alarm.mode)
         return self.get_alarm(alarm.id)
 
     def delete_alarm(self, alarm_id: int) -> bool:
         """Delete an alarm."""
-        cursor = self._conn.execute("DELETE FROM alarms WHERE id = ?", (alarm_id,))
-        self._conn.commit()
+        rowcount = self._write(
+            lambda conn: conn.execute(_SQL_DELETE_ALARM, (alarm_id,)).rowcount
+        )
+        self._invalidate_caches()
 
-        deleted = cursor.rowcount > 0
+        deleted = rowcount > 0
         if deleted:
-            logger.info(f"Deleted alarm {alarm_id}")
+            logger.info("Deleted alarm %d", alarm_id)
         return deleted
 
     def toggle_alarm(self, alarm_id: int, enabled: bool) -> Optional[Alarm]:
         """Enable or disable an alarm."""
-        self._conn.execute(
-            "UPDATE alarms SET enabled = ? WHERE id = ?", (int(enabled), alarm_id)
+        self._write(
+            lambda conn: conn.execute(_SQL_SET_ENABLED, (int(enabled), alarm_id))
         )
-        self._conn.commit()
+        self._invalidate_caches()
         return self.get_alarm(alarm_id)
 
     def mark_triggered(self, alarm_id: int) -> None:
         """Mark an alarm as triggered (update last_triggered timestamp)."""
-        self._conn.execute(
-            "UPDATE alarms SET last_triggered = datetime('now') WHERE id = ?",
-            (alarm_id,),
-        )
-        self._conn.commit()
+        self._write(lambda conn: conn.execute(_SQL_MARK_TRIGGERED, (alarm_id,)))
+        self._invalidate_caches()
+
+    def mark_triggered_many(self, alarm_ids: list[int]) -> None:
+        """
+        Mark several alarms as triggered and disable the 'once' alarms among
+        them, all in a single transaction.
+        """
+        if not alarm_ids:
+            return
+        params = [(alarm_id,) for alarm_id in alarm_ids]
+
+        def apply(conn: sqlite3.Connection) -> None:
+            conn.executemany(_SQL_MARK_TRIGGERED, params)
+            conn.executemany(_SQL_DISABLE_ONCE, params)
+
+        self._write(apply)
+        self._invalidate_caches()
 
     def disable_once_alarm(self, alarm_id: int) -> None:
         """Disable a 'once' alarm after it triggers."""
-        self._conn.execute(
-            "UPDATE alarms SET enabled = 0 WHERE id = ? AND days = 'once'", (alarm_id,)
-        )
-        self._conn.commit()
-
-    def _row_to_alarm(self, row) -> Alarm:
-        """Convert a database row to an Alarm object."""
-        return Alarm(
-            id=row[0],
-            name=row[1],
-            hour=row[2],
-            minute=row[3],
-            second=row[4],
-            clock_id=row[5],
-            enabled=bool(row[6]),
-            days=row[7],
-            duration=row[8],
-            mode=row[9] if len(row) > 9 and row[9] else "clock1",
-            pattern=row[10] if len(row) > 10 else None,
-            created_at=row[11] if len(row) > 11 else None,
-            last_triggered=row[12] if len(row) > 12 else None,
+        self._write(lambda conn: conn.execute(_SQL_DISABLE_ONCE, (alarm_id,)))
+        self._invalidate_caches()
+
+    @staticmethod
+    def _alarm_values(alarm: Alarm) -> tuple:
+        """Column values for INSERT/UPDATE, in the order the statements list them."""
+        return (
+            alarm.name,
+            alarm.hour,
+            alarm.minute,
+            alarm.second,
+            alarm.clock_id,
+            int(alarm.enabled),
+            alarm.days,
+            alarm.duration,
+            alarm.mode,
+            alarm.pattern,
+            days_to_mask(alarm.days),
+            int(alarm.days == "once"),
         )
 
+    def _row_to_alarm(self, row: sqlite3.Row) -> Alarm:
+        """
+        Convert a database row to an Alarm object.
+
+        Columns are looked up by name, so migrated tables whose columns were
+        appended in a different order still map correctly. The dataclass
+        __init__ is bypassed because every field, including days_mask, is
+        already stored.
+        """
+        alarm = object.__new__(Alarm)
+        alarm.id = row["id"]
+        alarm.name = row["name"]
+        alarm.hour = row["hour"]
+        alarm.minute = row["minute"]
+        alarm.second = row["second"]
+        alarm.clock_id = row["clock_id"]
+        alarm.enabled = bool(row["enabled"])
+        alarm.days = row["days"]
+        alarm.duration = row["duration"]
+        alarm.mode = row["mode"] or "clock1"
+        alarm.pattern = row["pattern"]
+        alarm.created_at = row["created_at"]
+        alarm.last_triggered = row["last_triggered"]
+        alarm.days_mask = row["days_mask"]
+        return alarm
+
 
 _db: Optional[Database] = None
+_db_lock = threading.Lock()
 
 
 def get_db() -> Database:
     """Get or create the global database instance."""
     global _db
     if _db is None:
-        _db = Database()
-        _db.connect()
+        with _db_lock:
+            if _db is None:
+                db = Database()
+                db.connect()
+                _db = db
     return _db
 
 
 def close_db() -> None:
     """Close the global database connection."""
     global _db
-    if _db:
-        _db.close()
-        _db = None
+    with _db_lock:
+        if _db:
+            _db.close()
+            _db = None
@@ -1,12 +1,18 @@
 """
 Kalembang GPIO Control
 
-Controls L298N motor driver via wiringOP CLI commands.
+Controls L298N motor driver via libgpiod, falling back to wiringOP CLI
+commands when libgpiod is not available.
 Supports two clock motors with enable (ENA/ENB) and direction (IN1-IN4) pins.
 """
 
+import os
+import select
+import shlex
 import subprocess
 import logging
+import threading
+import time
 from typing import Optional, Any
 
 from .config import (
@@ -15,36 +21,128 @@ from .config import (
     STOP_BTN_PIN,
     MOTOR_A_DIRECTION, MOTOR_B_DIRECTION,
     GPIO_BACKEND,
+    GPIO_LINE_NUMBERS,
+    GPIO_LINES_PER_CHIP,
     PWM_FREQUENCY,
+    HARDWARE_PWM_CHANNELS,
+    BUTTON_DEBOUNCE_TIME,
 )
-from .pwm import SoftwarePWM
+from .pwm import PWM, create_pwm
+
+try:
+    import gpiod
+    from gpiod.line import Bias, Direction, Edge, Value
+except ImportError:
+    gpiod = None
 
 logger = logging.getLogger(__name__)
 
+# MotorController._flags bits
+_INITIALIZED = 1 << 0
+_CLK1 = 1 << 1
+_CLK2 = 1 << 2
+_STOP_WATCHED = 1 << 3
+_STOP_PRESSED = 1 << 4
+
+# A falling edge only counts as a STOP press after this long without edges.
+_STOP_DEBOUNCE_NS = int(BUTTON_DEBOUNCE_TIME * 1_000_000_000)
+
 class GPIOError(Exception):
     """Raised when GPIO operations fail."""
 
 class WiringOPBackend:
-    """GPIO backend using wiringOP CLI commands."""
+    """
+    GPIO backend using wiringOP CLI commands.
 
-    @staticmethod
-    def _run_gpio_cmd(args: list[str]) -> str:
-        cmd = ["gpio"] + args
-        try:
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=5,
-                check=False,
-            )
-            if result.returncode != 0:
-                raise GPIOError(f"gpio command failed: {result.stderr}")
-            return result.stdout
-        except FileNotFoundError as exc:
-            raise GPIOError("wiringOP 'gpio' command not found. Install wiringOP first.") from exc
-        except subprocess.TimeoutExpired as exc:
-            raise GPIOError("gpio command timed out") from exc
+    Commands are fed to one long-lived `sh` over a pipe instead of spawning a
+    process per call. Each command is followed by an echo of a marker and the
+    exit status, which is how the reader knows the command has finished.
+    """
+
+    TIMEOUT = 5.0
+    _MARKER = b"__KALEMBANG_DONE__"
+
+    def __init__(self):
+        self._proc: Optional[subprocess.Popen[bytes]] = None
+        self._lock = threading.Lock()
+
+    def _shell(self) -> subprocess.Popen[bytes]:
+        if self._proc is None or self._proc.poll() is not None:
+            try:
+                self._proc = subprocess.Popen(
+                    ["sh"],
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
+                )
+            except OSError as exc:
+                raise GPIOError(f"Failed to start gpio helper shell: {exc}") from exc
+        return self._proc
+
+    def _kill_shell(self) -> None:
+        if self._proc is not None:
+            self._proc.kill()
+            self._proc.wait()
+            self._proc = None
+
+    def _run(self, script: str) -> str:
+        """Run a shell command line in the helper shell and return its output."""
+        with self._lock:
+            proc = self._shell()
+            line = f'{script} 2>&1; echo "{self._MARKER.decode()} $?"\n'
+            try:
+                proc.stdin.write(line.encode())
+                proc.stdin.flush()
+                output, status = self._read_result(proc)
+            except (OSError, GPIOError):
+                self._kill_shell()
+                raise
+
+        if status == 127:
+            raise GPIOError("wiringOP 'gpio' command not found. Install wiringOP first.")
+        if status != 0:
+            raise GPIOError(f"gpio command failed: {output}")
+        return output
+
+    def _read_result(self, proc: subprocess.Popen[bytes]) -> tuple[str, int]:
+        """Read output up to the completion marker and return (output, exit status)."""
+        fd = proc.stdout.fileno()
+        deadline = time.monotonic() + self.TIMEOUT
+        buf = b""
+        while True:
+            start = buf.find(self._MARKER)
+            if start != -1:
+                end = buf.find(b"\n", start)
+                if end != -1:
+                    status = int(buf[start + len(self._MARKER):end])
+                    return buf[:start].decode(errors="replace"), status
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+                raise GPIOError("gpio command timed out")
+            chunk = os.read(fd, 4096)
+            if not chunk:
+                raise GPIOError("gpio helper shell exited unexpectedly")
+            buf += chunk
+
+    def _run_gpio_cmd(self, args: list[str]) -> str:
+        return self._run(shlex.join(["gpio"] + args))
+
+    def bulk(self, cmds: list[list[str]]) -> str:
+        """Run several gpio commands in one shell line, stopping at the first failure."""
+        return self._run(" && ".join(shlex.join(["gpio"] + args) for args in cmds))
+
+    def setup_pins(self, outputs: dict[int, int], inputs_pullup: list[int]) -> None:
+        """Configure output pins with initial values and pull-up inputs in one call."""
+        cmds: list[list[str]] = []
+        for pin, value in outputs.items():
+            cmds.append(["mode", str(pin), "out"])
+            cmds.append(["write", str(pin), str(value)])
+        for pin in inputs_pullup:
+            cmds.append(["mode", str(pin), "in"])
+            cmds.append(["mode", str(pin), "up"])
+        self.bulk(cmds)
+        logger.debug("Configured %d output and %d input pins", len(outputs), len(inputs_pullup))
 
     def setup_pin_output(self, pin: int) -> None:
         self._run_gpio_cmd(["mode", str(pin), "out"])
@@ -64,6 +162,137 @@ class WiringOPBackend:
         output = self._run_gpio_cmd(["read", str(pin)])
         return int(output.strip())
 
+    def close(self) -> None:
+        """Shut down the helper shell."""
+        with self._lock:
+            if self._proc is not None and self._proc.poll() is None:
+                self._proc.stdin.close()
+                try:
+                    self._proc.wait(timeout=self.TIMEOUT)
+                except subprocess.TimeoutExpired:
+                    self._proc.kill()
+            self._proc = None
+
+class LibgpiodBackend:
+    """
+    GPIO backend using the libgpiod v2 character-device API.
+
+    Each pin is requested once during setup and the request is kept open,
+    so reads and writes are a single ioctl instead of a `gpio` process.
+    Inputs are requested with edge detection so they can be watched
+    without polling.
+    """
+
+    CONSUMER = "kalembang"
+
+    def __init__(self):
+        if gpiod is None:
+            raise GPIOError("libgpiod Python bindings not installed (pip install gpiod)")
+        self._lines: dict[int, tuple[Any, int]] = {}
+
+    def _request(self, pin: int, settings: Any) -> None:
+        if pin not in GPIO_LINE_NUMBERS:
+            raise GPIOError(f"No GPIO line number configured for pin {pin}")
+        chip, offset = divmod(GPIO_LINE_NUMBERS[pin], GPIO_LINES_PER_CHIP)
+        self._release(pin)
+        try:
+            request = gpiod.request_lines(
+                f"/dev/gpiochip{chip}",
+                consumer=self.CONSUMER,
+                config={offset: settings},
+            )
+        except OSError as exc:
+            raise GPIOError(f"Failed to request GPIO line for pin {pin}: {exc}") from exc
+        self._lines[pin] = (request, offset)
+
+    def _release(self, pin: int) -> None:
+        line = self._lines.pop(pin, None)
+        if line is not None:
+            line[0].release()
+
+    def _line(self, pin: int) -> tuple[Any, int]:
+        try:
+            return self._lines[pin]
+        except KeyError as exc:
+            raise GPIOError(f"Pin {pin} has not been set up") from exc
+
+    def setup_pin_output(self, pin: int, value: int = 0) -> None:
+        self._request(
+            pin,
+            gpiod.LineSettings(
+                direction=Direction.OUTPUT,
+                output_value=Value.ACTIVE if value else Value.INACTIVE,
+            ),
+        )
+        logger.debug("Pin %d configured as output", pin)
+
+    def setup_pin_input_pullup(self, pin: int) -> None:
+        self._request(
+            pin,
+            gpiod.LineSettings(
+                direction=Direction.INPUT,
+                bias=Bias.PULL_UP,
+                edge_detection=Edge.BOTH,
+            ),
+        )
+        logger.debug("Pin %d configured as input with pull-up", pin)
+
+    def setup_pins(self, outputs: dict[int, int], inputs_pullup: list[int]) -> None:
+        """
+        Configure output pins with initial values and pull-up inputs.
+
+        If any line cannot be requested, the lines already claimed are
+        released before the error propagates.
+        """
+        try:
+            for pin, value in outputs.items():
+                self.setup_pin_output(pin, value)
+            for pin in inputs_pullup:
+                self.setup_pin_input_pullup(pin)
+        except GPIOError:
+            self.close()
+            raise
+
+    def write(self, pin: int, value: int) -> None:
+        """Write a digital value (0 or 1) to a pin."""
+        request, offset = self._line(pin)
+        request.set_value(offset, Value.ACTIVE if value else Value.INACTIVE)
+
+    def read(self, pin: int) -> int:
+        """Read a digital value from a pin."""
+        request, offset = self._line(pin)
+        return 1 if request.get_value(offset) == Value.ACTIVE else 0
+
+    def edge_event_fd(self, pin: int) -> int:
+        """File descriptor that becomes readable when an input pin has edge events."""
+        request, _ = self._line(pin)
+        return request.fd
+
+    def read_edge_events(self, pin: int) -> list[tuple[int, int]]:
+        """
+        Drain pending edge events for an input pin as (timestamp_ns, level).
+
+        Blocks when nothing is pending, so only call it once the fd from
+        edge_event_fd() is readable.
+        """
+        request, _ = self._line(pin)
+        try:
+            events = request.read_edge_events()
+        except OSError as exc:
+            raise GPIOError(f"Failed to read edge events for pin {pin}: {exc}") from exc
+        return [
+            (
+                event.timestamp_ns,
+                0 if event.event_type == gpiod.EdgeEvent.Type.FALLING_EDGE else 1,
+            )
+            for event in events
+        ]
+
+    def close(self) -> None:
+        """Release all requested lines."""
+        for pin in list(self._lines):
+            self._release(pin)
+
 class MockBackend:
     """Mock GPIO backend for development/testing without hardware."""
 
@@ -82,6 +311,13 @@ class MockBackend:
         self._pins[pin] = 1  # Pull-up means HIGH when not pressed
         logger.debug("[MOCK] Pin %d configured as input with pull-up", pin)
 
+    def setup_pins(self, outputs: dict[int, int], inputs_pullup: list[int]) -> None:
+        for pin, value in outputs.items():
+            self.setup_pin_output(pin)
+            self.write(pin, value)
+        for pin in inputs_pullup:
+            self.setup_pin_input_pullup(pin)
+
     def write(self, pin: int, value: int) -> None:
         self._pins[pin] = value
         logger.debug("[MOCK] Pin %d = %d", pin, value)
@@ -89,6 +325,9 @@ class MockBackend:
     def read(self, pin: int) -> int:
         return self._pins.get(pin, 1)
 
+    def close(self) -> None:
+        pass
+
 class MotorController:
     """
     Controls two clock motors via L298N motor driver.
@@ -97,6 +336,18 @@ class MotorController:
     Motor B (Clock 2): ENB, IN3, IN4
     """
 
+    __slots__ = (
+        "_backend",
+        "_flags",
+        "_clock1_duty",
+        "_clock2_duty",
+        "_pwm1",
+        "_pwm2",
+        "_stop_edge_ns",
+        "_on",
+        "_off",
+    )
+
     def __init__(self, use_mock: bool = False):
         """
         Initialize motor controller.
@@ -106,20 +357,28 @@ class MotorController:
         """
         if use_mock:
             self._backend = MockBackend()
+        elif GPIO_BACKEND == "gpiod":
+            try:
+                self._backend = LibgpiodBackend()
+            except GPIOError as e:
+                logger.warning("%s - falling back to wiringOP", e)
+                self._backend = WiringOPBackend()
         elif GPIO_BACKEND == "wiringop":
             self._backend = WiringOPBackend()
         else:
             raise GPIOError(f"Unknown GPIO backend: {GPIO_BACKEND}")
 
-        self._clock1_enabled = False
-        self._clock2_enabled = False
+        self._flags = 0
+        self._stop_edge_ns = 0
         self._clock1_duty = 100
         self._clock2_duty = 100
 
-        self._pwm1: Optional[SoftwarePWM] = None
-        self._pwm2: Optional[SoftwarePWM] = None
+        self._pwm1: Optional[PWM] = None
+        self._pwm2: Optional[PWM] = None
 
-        self._initialized = False
+        # Indexed by clock_id - 1.
+        self._on = (self.clock1_on, self.clock2_on)
+        self._off = (self.clock1_off, self.clock2_off)
 
     def initialize(self) -> None:
         """
@@ -128,52 +387,73 @@ class MotorController:
         MUST be called before any motor operations.
         Sets all motors to OFF state.
         """
-        if self._initialized:
+        if self._flags & _INITIALIZED:
             return
 
         logger.info("Initializing GPIO pins...")
 
-        self._backend.setup_pin_output(ENA_PIN)
-        self._backend.setup_pin_output(ENB_PIN)
-
-        self._backend.setup_pin_output(IN1_PIN)
-        self._backend.setup_pin_output(IN2_PIN)
-        self._backend.setup_pin_output(IN3_PIN)
-        self._backend.setup_pin_output(IN4_PIN)
-
-        self._backend.setup_pin_input_pullup(STOP_BTN_PIN)
+        try:
+            self._setup_pins()
+        except GPIOError as e:
+            # The bindings import on any Linux host even when /dev/gpiochip*
+            # is not accessible to the service user; wiringOP still works.
+            if not isinstance(self._backend, LibgpiodBackend):
+                raise
+            logger.warning("%s - falling back to wiringOP", e)
+            self._backend = WiringOPBackend()
+            self._setup_pins()
 
-        self.all_off()
+        self._flags |= _INITIALIZED
+        logger.info("GPIO initialization complete - all motors OFF")
 
+    def _setup_pins(self) -> None:
+        """Create the enable PWMs and configure every pin on the backend."""
         in1, in2 = MOTOR_A_DIRECTION
         in3, in4 = MOTOR_B_DIRECTION
-        self._backend.write(IN1_PIN, in1)
-        self._backend.write(IN2_PIN, in2)
-        self._backend.write(IN3_PIN, in3)
-        self._backend.write(IN4_PIN, in4)
 
-        self._pwm1 = SoftwarePWM(ENA_PIN, self._backend.write, PWM_FREQUENCY)
-        self._pwm2 = SoftwarePWM(ENB_PIN, self._backend.write, PWM_FREQUENCY)
-
-        self._initialized = True
-        logger.info("GPIO initialization complete - all motors OFF")
+        hardware_channels = (
+            {} if isinstance(self._backend, MockBackend) else HARDWARE_PWM_CHANNELS
+        )
+        self._pwm1 = create_pwm(
+            ENA_PIN, self._backend.write, PWM_FREQUENCY, hardware_channels.get(ENA_PIN)
+        )
+        self._pwm2 = create_pwm(
+            ENB_PIN, self._backend.write, PWM_FREQUENCY, hardware_channels.get(ENB_PIN)
+        )
+
+        # Enables go low before the direction pins are driven so neither
+        # motor can spin while the H-bridge is being configured. Hardware
+        # PWM enables are owned by the PWM block and start disabled.
+        outputs = {
+            pin: 0
+            for pin, pwm in ((ENA_PIN, self._pwm1), (ENB_PIN, self._pwm2))
+            if not pwm.hardware
+        }
+        outputs.update({IN1_PIN: in1, IN2_PIN: in2, IN3_PIN: in3, IN4_PIN: in4})
+        self._backend.setup_pins(outputs, [STOP_BTN_PIN])
+        self._flags &= ~(_CLK1 | _CLK2)
 
     def _ensure_initialized(self) -> None:
         """Ensure GPIO is initialized before operations."""
-        if not self._initialized:
+        if not self._flags & _INITIALIZED:
             raise GPIOError("MotorController not initialized. Call initialize() first.")
 
+    def _drive_enable(self, pwm: PWM, pin: int, duty: int) -> None:
+        """Run an enable pin at `duty`; software PWM holds the pin high at 100%."""
+        if duty >= 100 and not pwm.hardware:
+            pwm.stop()
+            self._backend.write(pin, 1)
+        else:
+            pwm.set_duty(duty)
+            if not pwm.is_running:
+                pwm.start()
+
     def clock1_on(self) -> None:
         self._ensure_initialized()
         if self._pwm1 is None:
             raise GPIOError("PWM not initialized")
-        if self._clock1_duty < 100:
-            self._pwm1.set_duty(self._clock1_duty)
-            self._pwm1.start()
-        else:
-            self._pwm1.stop()
-            self._backend.write(ENA_PIN, 1)
-        self._clock1_enabled = True
+        self._drive_enable(self._pwm1, ENA_PIN, self._clock1_duty)
+        self._flags |= _CLK1
         logger.info("Clock 1 ON (duty: %d%%)", self._clock1_duty)
 
     def clock1_off(self) -> None:
@@ -181,21 +461,15 @@ class MotorController:
         if self._pwm1 is None:
             raise GPIOError("PWM not initialized")
         self._pwm1.stop()
-        self._backend.write(ENA_PIN, 0)
-        self._clock1_enabled = False
+        self._flags &= ~_CLK1
         logger.info("Clock 1 OFF")
 
     def clock2_on(self) -> None:
         self._ensure_initialized()
         if self._pwm2 is None:
             raise GPIOError("PWM not initialized")
-        if self._clock2_duty < 100:
-            self._pwm2.set_duty(self._clock2_duty)
-            self._pwm2.start()
-        else:
-            self._pwm2.stop()
-            self._backend.write(ENB_PIN, 1)
-        self._clock2_enabled = True
+        self._drive_enable(self._pwm2, ENB_PIN, self._clock2_duty)
+        self._flags |= _CLK2
         logger.info("Clock 2 ON (duty: %d%%)", self._clock2_duty)
 
     def clock2_off(self) -> None:
@@ -203,19 +477,28 @@ class MotorController:
         if self._pwm2 is None:
             raise GPIOError("PWM not initialized")
         self._pwm2.stop()
-        self._backend.write(ENB_PIN, 0)
-        self._clock2_enabled = False
+        self._flags &= ~_CLK2
         logger.info("Clock 2 OFF")
 
+    def clock_on(self, clock_id: int) -> None:
+        """Turn on the clock with the given id (1 or 2)."""
+        if clock_id not in (1, 2):
+            raise GPIOError(f"Unknown clock id: {clock_id}")
+        self._on[clock_id - 1]()
+
+    def clock_off(self, clock_id: int) -> None:
+        """Turn off the clock with the given id (1 or 2)."""
+        if clock_id not in (1, 2):
+            raise GPIOError(f"Unknown clock id: {clock_id}")
+        self._off[clock_id - 1]()
+
     def all_off(self) -> None:
-        if self._pwm1:
-            self._pwm1.stop()
-        if self._pwm2:
-            self._pwm2.stop()
-        self._backend.write(ENA_PIN, 0)
-        self._backend.write(ENB_PIN, 0)
-        self._clock1_enabled = False
-        self._clock2_enabled = False
+        for pwm, pin in ((self._pwm1, ENA_PIN), (self._pwm2, ENB_PIN)):
+            if pwm:
+                pwm.stop()
+            else:
+                self._backend.write(pin, 0)
+        self._flags &= ~(_CLK1 | _CLK2)
         logger.info("All clocks OFF")
 
     def set_clock1_duty(self, duty: int) -> None:
@@ -225,18 +508,13 @@ class MotorController:
             raise GPIOError("PWM not initialized")
         self._clock1_duty = max(0, min(100, duty))
 
-        if self._clock1_enabled:
+        if self._flags & _CLK1:
             if self._clock1_duty == 0:
                 self.clock1_off()
-            elif self._clock1_duty == 100:
-                self._pwm1.stop()
-                self._backend.write(ENA_PIN, 1)
             else:
-                self._pwm1.set_duty(self._clock1_duty)
-                if not self._pwm1.is_running:
-                    self._pwm1.start()
+                self._drive_enable(self._pwm1, ENA_PIN, self._clock1_duty)
 
-        logger.info("Clock 1 duty set to %d%%", self._clock1_duty)
+        logger.debug("Clock 1 duty set to %d%%", self._clock1_duty)
 
     def set_clock2_duty(self, duty: int) -> None:
         """Set duty cycle for Clock 2 (0-100)."""
@@ -245,29 +523,69 @@ class MotorController:
             raise GPIOError("PWM not initialized")
         self._clock2_duty = max(0, min(100, duty))
 
-        if self._clock2_enabled:
+        if self._flags & _CLK2:
             if self._clock2_duty == 0:
                 self.clock2_off()
-            elif self._clock2_duty == 100:
-                self._pwm2.stop()
-                self._backend.write(ENB_PIN, 1)
             else:
-                self._pwm2.set_duty(self._clock2_duty)
-                if not self._pwm2.is_running:
-                    self._pwm2.start()
+                self._drive_enable(self._pwm2, ENB_PIN, self._clock2_duty)
 
-        logger.info("Clock 2 duty set to %d%%", self._clock2_duty)
+        logger.debug("Clock 2 duty set to %d%%", self._clock2_duty)
 
     def read_stop_button(self) -> bool:
         """
         Read the STOP button state.
 
+        Served from the edge-watched state when the backend supports it,
+        otherwise read from the pin.
+
         Returns:
             True if button is pressed (active LOW)
         """
         self._ensure_initialized()
+        if self._flags & _STOP_WATCHED:
+            return bool(self._flags & _STOP_PRESSED)
         return self._backend.read(STOP_BTN_PIN) == 0
 
+    def stop_button_event_fd(self) -> Optional[int]:
+        """
+        File descriptor that becomes readable on STOP button edges.
+
+        From this call on, read_stop_button() is served from the state kept
+        by drain_stop_button_events(), so the caller must drain the fd
+        whenever it is readable.
+
+        Returns None when the backend cannot report edges; callers should
+        poll read_stop_button() instead.
+        """
+        self._ensure_initialized()
+        if not hasattr(self._backend, "edge_event_fd"):
+            return None
+        if not self._flags & _STOP_WATCHED:
+            if self._backend.read(STOP_BTN_PIN) == 0:
+                self._flags |= _STOP_PRESSED
+            self._flags |= _STOP_WATCHED
+        return self._backend.edge_event_fd(STOP_BTN_PIN)
+
+    def drain_stop_button_events(self) -> bool:
+        """
+        Consume pending STOP button edges and update the cached state.
+
+        Returns:
+            True if a debounced press was seen
+        """
+        pressed = False
+        level = None
+        for timestamp_ns, level in self._backend.read_edge_events(STOP_BTN_PIN):
+            if level == 0 and timestamp_ns - self._stop_edge_ns >= _STOP_DEBOUNCE_NS:
+                pressed = True
+            self._stop_edge_ns = timestamp_ns
+        if level is not None:
+            if level == 0:
+                self._flags |= _STOP_PRESSED
+            else:
+                self._flags &= ~_STOP_PRESSED
+        return pressed
+
     def trigger_stop(self) -> None:
         """Trigger emergency stop - turns off all motors."""
         self.all_off()
@@ -276,31 +594,36 @@ class MotorController:
     def get_status(self) -> dict[str, Any]:
         return {
             "clock1": {
-                "enabled": self._clock1_enabled,
+                "enabled": bool(self._flags & _CLK1),
                 "duty": self._clock1_duty,
             },
             "clock2": {
-                "enabled": self._clock2_enabled,
+                "enabled": bool(self._flags & _CLK2),
                 "duty": self._clock2_duty,
             },
-            "stop_button_pressed": self.read_stop_button() if self._initialized else None,
+            "stop_button_pressed": self.read_stop_button() if self._flags & _INITIALIZED else None,
         }
 
     def cleanup(self) -> None:
-        if self._initialized:
+        if self._flags & _INITIALIZED:
             if self._pwm1:
                 self._pwm1.stop()
             if self._pwm2:
                 self._pwm2.stop()
             self.all_off()
+            self._backend.close()
             logger.info("GPIO cleanup complete")
 
 
 class _ControllerHolder:
     instance: Optional[MotorController] = None
+    lock = threading.Lock()
 
 
 def get_controller(use_mock: bool = False) -> MotorController:
+    """Get or create the process-wide motor controller."""
     if _ControllerHolder.instance is None:
-        _ControllerHolder.instance = MotorController(use_mock=use_mock)
+        with _ControllerHolder.lock:
+            if _ControllerHolder.instance is None:
+                _ControllerHolder.instance = MotorController(use_mock=use_mock)
     return _ControllerHolder.instance
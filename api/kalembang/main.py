@@ -6,23 +6,27 @@ Controls clock motors via L298N motor driver.
 """
 
 import asyncio
+import hashlib
+import heapq
 import logging
+import math
 import os
+import time
 from contextlib import asynccontextmanager
-from datetime import datetime
-from typing import Optional
+from datetime import datetime, timedelta
+from typing import Annotated, Collection, Optional
 
 from pathlib import Path
 
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import Depends, FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response
 from pydantic import BaseModel, Field
 
 from .config import API_HOST, API_PORT, BUTTON_DEBOUNCE_TIME, STOP_BUTTON_ENABLED
-from .gpio import get_controller, GPIOError
-from .database import get_db, close_db, Alarm
+from .gpio import get_controller, GPIOError, MotorController
+from .database import get_db, close_db, Alarm, Database
 from .patterns import (
     get_preset_patterns,
     get_preset_pattern,
@@ -37,6 +41,8 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+_DAY_NAMES = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
 
 class DutyRequest(BaseModel):
     """Request body for setting motor duty cycle."""
@@ -111,29 +117,44 @@ class TimeResponse(BaseModel):
     day_of_week: str
 
 
+# A polled STOP press needs this many consecutive pressed samples, taken
+# within one BUTTON_DEBOUNCE_TIME window so the reaction time stays one
+# window. Kept small because on wiringOP each sample costs a `gpio` exec.
+_STOP_SAMPLES = 2
+_STOP_SAMPLES_PRESSED = (1 << _STOP_SAMPLES) - 1
+_STOP_SAMPLE_INTERVAL = BUTTON_DEBOUNCE_TIME / _STOP_SAMPLES
+
+
 async def stop_button_monitor():
     """
-    Background task to monitor the STOP button.
+    Background task to poll the STOP button.
 
-    When pressed, immediately stops all motors.
+    Used when the GPIO backend cannot report edge events. The last
+    _STOP_SAMPLES readings are kept as bits of one integer: the button
+    counts as pressed once all of them read pressed, and as released once
+    none do. A press immediately stops all motors.
     """
     controller = get_controller()
+    samples = 0
     button_was_pressed = False
 
     logger.info("STOP button monitor started")
 
     while True:
         try:
-            button_pressed = controller.read_stop_button()
+            samples = (
+                (samples << 1) | controller.read_stop_button()
+            ) & _STOP_SAMPLES_PRESSED
 
-            if button_pressed and not button_was_pressed:
+            if samples == _STOP_SAMPLES_PRESSED and not button_was_pressed:
                 logger.warning("STOP button pressed - stopping all motors!")
                 controller.trigger_stop()
                 _clear_all_active_alarms()
+                button_was_pressed = True
+            elif samples == 0:
+                button_was_pressed = False
 
-            button_was_pressed = button_pressed
-
-            await asyncio.sleep(BUTTON_DEBOUNCE_TIME)
+            await asyncio.sleep(_STOP_SAMPLE_INTERVAL)
 
         except GPIOError as e:
             logger.error("GPIO error in stop button monitor: %s", e)
@@ -146,100 +167,174 @@ async def stop_button_monitor():
             await asyncio.sleep(1.0)
 
 
+def _on_stop_edge(controller) -> None:
+    """Event-loop reader callback for STOP button edge events."""
+    try:
+        if controller.drain_stop_button_events():
+            logger.warning("STOP button pressed - stopping all motors!")
+            controller.trigger_stop()
+            _clear_all_active_alarms()
+    except GPIOError as e:
+        logger.error("GPIO error in stop button handler: %s", e)
+
+
 _alarm_off_tasks: dict[int, asyncio.Task[None]] = {}
 _pattern_tasks: dict[int, asyncio.Task[None]] = {}
 _active_alarms: dict[int, dict] = {}
 
 
+# Upper bound on one scheduler sleep, so wall-clock adjustments (NTP, manual
+# changes) are noticed within this many seconds.
+SCHEDULER_MAX_SLEEP = 60.0
+
+# Sleep this far past a deadline so the wakeup never lands just before it.
+_CLOCK_SLACK = time.get_clock_info("monotonic").resolution
+
+# The wall clock advancing this many seconds more than the monotonic clock
+# over one scheduler pass is taken as a forward jump (e.g. NTP at boot).
+_CLOCK_JUMP_TOLERANCE = 5.0
+
+_reload_event: Optional[asyncio.Event] = None
+
+
+def _request_reload() -> None:
+    """Wake the scheduler so it recomputes its next deadline."""
+    if _reload_event is not None:
+        _reload_event.set()
+
+
+# Min-heap of (fire_time, alarm_id, version). Entries are never removed in
+# place; bumping an alarm's version in _alarm_versions invalidates them, and
+# stale entries are discarded when they reach the root.
+_alarm_heap: list[tuple[datetime, int, int]] = []
+_alarm_versions: dict[int, int] = {}
+_scheduled_alarms: dict[int, Alarm] = {}
+
+
+def _schedule_alarm(alarm: Alarm, after: datetime) -> None:
+    """(Re)arm an alarm at its first fire time at or after `after`."""
+    if alarm.id is None:
+        return
+    version = _alarm_versions.get(alarm.id, 0) + 1
+    _alarm_versions[alarm.id] = version
+    fire_time = alarm.next_fire_time(after)
+    if fire_time is None:
+        _scheduled_alarms.pop(alarm.id, None)
+        return
+    _scheduled_alarms[alarm.id] = alarm
+    heapq.heappush(_alarm_heap, (fire_time, alarm.id, version))
+
+
+def _unschedule_alarm(alarm_id: int) -> None:
+    """Drop any armed entries for an alarm."""
+    _alarm_versions[alarm_id] = _alarm_versions.get(alarm_id, 0) + 1
+    _scheduled_alarms.pop(alarm_id, None)
+
+
+def _rebuild_schedule(db, after: datetime) -> None:
+    """Arm every enabled alarm from scratch."""
+    _alarm_heap.clear()
+    _scheduled_alarms.clear()
+    for alarm in db.get_enabled_alarms():
+        _schedule_alarm(alarm, after)
+
+
+def _next_deadline(after: datetime, fired: Collection[int] = ()) -> Optional[datetime]:
+    """
+    Earliest time at or after `after` that a scheduled alarm rings.
+
+    Entries before `after` have already been handled and are re-armed for
+    their next occurrence. One-shot alarms in `fired` are dropped instead;
+    one that was passed without firing stays enabled, so it is re-armed too.
+    """
+    while _alarm_heap:
+        fire_time, alarm_id, version = _alarm_heap[0]
+        if _alarm_versions.get(alarm_id) != version:
+            heapq.heappop(_alarm_heap)
+            continue
+        if fire_time >= after:
+            return fire_time
+        heapq.heappop(_alarm_heap)
+        alarm = _scheduled_alarms[alarm_id]
+        if alarm.days == "once" and alarm_id in fired:
+            _unschedule_alarm(alarm_id)
+        else:
+            _schedule_alarm(alarm, after)
+    return None
+
+
 async def alarm_scheduler():
     """
     Background task to check and trigger alarms.
 
-    Runs every second and checks if any enabled alarm matches the current time.
+    Sleeps until the earliest upcoming alarm instead of waking every second,
+    and is woken early by _request_reload() whenever alarms change. Each
+    second is handled at most once, and seconds passed while the loop was
+    late are caught up.
     Supports three modes: clock1, clock2, and pattern.
     """
+    global _reload_event
+    _reload_event = asyncio.Event()
     logger.info("Alarm scheduler started")
 
+    # Next second that has not been checked for alarms yet.
+    cursor = datetime.now().replace(microsecond=0)
+    _rebuild_schedule(get_db(), cursor)
+
     while True:
         try:
-            now = datetime.now()
             db = get_db()
             controller = get_controller()
 
-            enabled_alarms = db.get_enabled_alarms()
-            for alarm in enabled_alarms:
-                if alarm.id is None:
-                    continue
-                alarm_id = alarm.id
-                if alarm_id in _active_alarms:
-                    continue
-                if alarm.matches_time(now):
-                    logger.info(
-                        "Triggering alarm: %s (mode=%s)", alarm.name, alarm.mode
-                    )
-
-                    db.mark_triggered(alarm_id)
-
-                    if alarm.days == "once":
-                        db.disable_once_alarm(alarm_id)
-
-                    _active_alarms[alarm_id] = {
-                        "id": alarm_id,
-                        "name": alarm.name,
-                        "clock_id": alarm.clock_id,
-                        "mode": alarm.mode,
-                    }
-
-                    if alarm.mode == "pattern" and alarm.pattern:
-                        if alarm_id in _pattern_tasks:
-                            _pattern_tasks[alarm_id].cancel()
-
-                        async def play_pattern(aid: int, pattern_json: str) -> None:
-                            try:
-                                player = get_pattern_player(controller)
-                                await player.play_json(pattern_json)
-                            except Exception as e:
-                                logger.error(
-                                    "Pattern playback error for alarm %d: %s", aid, e
-                                )
-                            finally:
-                                _pattern_tasks.pop(aid, None)
-                                _active_alarms.pop(aid, None)
-
-                        task = asyncio.create_task(
-                            play_pattern(alarm_id, alarm.pattern)
-                        )
-                        _pattern_tasks[alarm_id] = task
-
-                    else:
-                        clock_id = 1 if alarm.mode == "clock1" else 2
-
-                        if clock_id == 1:
-                            controller.clock1_on()
-                        else:
-                            controller.clock2_on()
-
-                        if alarm.duration > 0:
-                            if alarm_id in _alarm_off_tasks:
-                                _alarm_off_tasks[alarm_id].cancel()
-
-                            async def auto_off(cid: int, aid: int, dur: int) -> None:
-                                await asyncio.sleep(dur)
-                                ctrl = get_controller()
-                                if cid == 1:
-                                    ctrl.clock1_off()
-                                else:
-                                    ctrl.clock2_off()
-                                logger.info("Alarm %d auto-off after %ds", aid, dur)
-                                _alarm_off_tasks.pop(aid, None)
-                                _active_alarms.pop(aid, None)
-
-                            task = asyncio.create_task(
-                                auto_off(clock_id, alarm_id, alarm.duration)
-                            )
-                            _alarm_off_tasks[alarm_id] = task
-
-            await asyncio.sleep(1.0 - (datetime.now().microsecond / 1_000_000))
+            now = datetime.now()
+            started = time.monotonic()
+            if cursor > now + timedelta(seconds=1):
+                # The wall clock was set back; resume from the new time and
+                # re-arm, since the heap holds deadlines from the old clock.
+                cursor = now.replace(microsecond=0)
+                _rebuild_schedule(db, cursor)
+            fired: list[int] = []
+            try:
+                while cursor <= now:
+                    for alarm in db.get_alarms_at(cursor):
+                        if _fire_alarm(controller, alarm):
+                            fired.append(alarm.id)
+                    cursor += timedelta(seconds=1)
+            finally:
+                # One write transaction for everything that fired this wake-up.
+                db.mark_triggered_many(fired)
+
+            deadline = _next_deadline(cursor, fired)
+            timeout = SCHEDULER_MAX_SLEEP
+            if deadline is not None:
+                until = (deadline - datetime.now()).total_seconds() + _CLOCK_SLACK
+                timeout = max(0.0, min(timeout, until))
+
+            _reload_event.clear()
+            try:
+                await asyncio.wait_for(_reload_event.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+            elapsed = time.monotonic() - started
+            woke = datetime.now()
+            jump = (woke - now).total_seconds() - elapsed
+            now_second = woke.replace(microsecond=0)
+            if jump > _CLOCK_JUMP_TOLERANCE:
+                # The wall clock jumped forward; skip the jumped-over span
+                # instead of replaying its alarms, but still check the
+                # seconds that really passed since this pass started.
+                logger.warning("Clock jumped forward %.0fs; rescheduling alarms", jump)
+                cursor = now_second - timedelta(seconds=math.ceil(elapsed))
+                _rebuild_schedule(db, cursor)
+                continue
+
+            # Nothing was due before the deadline, so seconds before it (or
+            # before now, if sooner) are skipped; from the deadline up to now
+            # every second is checked, so a late wake-up still fires it.
+            if deadline is not None:
+                now_second = min(now_second, deadline)
+            cursor = max(cursor, now_second)
 
         except asyncio.CancelledError:
             logger.info("Alarm scheduler stopped")
@@ -249,24 +344,105 @@ async def alarm_scheduler():
             await asyncio.sleep(1.0)
 
 
+def _fire_alarm(controller, alarm: Alarm) -> bool:
+    """
+    Start a due alarm in its configured mode.
+
+    Returns True if the alarm was started; the caller records it as
+    triggered.
+    """
+    if alarm.id is None:
+        return False
+    alarm_id = alarm.id
+    if alarm_id in _active_alarms:
+        return False
+    logger.info("Triggering alarm: %s (mode=%s)", alarm.name, alarm.mode)
+
+    _active_alarms[alarm_id] = {
+        "id": alarm_id,
+        "name": alarm.name,
+        "clock_id": alarm.clock_id,
+        "mode": alarm.mode,
+    }
+
+    if alarm.mode == "pattern" and alarm.pattern:
+        if alarm_id in _pattern_tasks:
+            _pattern_tasks[alarm_id].cancel()
+
+        async def play_pattern(aid: int, pattern_json: str) -> None:
+            try:
+                player = get_pattern_player(controller)
+                await player.play_json(pattern_json)
+            except Exception as e:
+                logger.error("Pattern playback error for alarm %d: %s", aid, e)
+            finally:
+                _active_alarms.pop(aid, None)
+
+        task = asyncio.create_task(play_pattern(alarm_id, alarm.pattern))
+        _track_task(_pattern_tasks, alarm_id, task)
+
+    else:
+        clock_id = 1 if alarm.mode == "clock1" else 2
+        controller.clock_on(clock_id)
+
+        if alarm.duration > 0:
+            if alarm_id in _alarm_off_tasks:
+                _alarm_off_tasks[alarm_id].cancel()
+
+            async def auto_off(cid: int, aid: int, dur: int) -> None:
+                try:
+                    await asyncio.sleep(dur)
+                    get_controller().clock_off(cid)
+                    logger.info("Alarm %d auto-off after %ds", aid, dur)
+                finally:
+                    _active_alarms.pop(aid, None)
+
+            task = asyncio.create_task(auto_off(clock_id, alarm_id, alarm.duration))
+            _track_task(_alarm_off_tasks, alarm_id, task)
+
+    return True
+
+
+def _track_task(
+    tasks: dict[int, asyncio.Task[None]], alarm_id: int, task: asyncio.Task[None]
+) -> None:
+    """Register a per-alarm task that removes its own entry once it finishes."""
+    tasks[alarm_id] = task
+
+    def forget(done: asyncio.Task[None]) -> None:
+        # A replacement task may already be registered under the same id.
+        if tasks.get(alarm_id) is done:
+            del tasks[alarm_id]
+
+    task.add_done_callback(forget)
+
+
 @asynccontextmanager
-async def lifespan(_app: FastAPI):
+async def lifespan(application: FastAPI):
     """Application lifespan manager for startup and shutdown."""
     logger.info("Kalembang starting up...")
 
     use_mock = os.environ.get("KALEMBANG_MOCK_GPIO", "").lower() in ("1", "true", "yes")
 
     tasks: list[asyncio.Task[None]] = []
+    stop_fd: Optional[int] = None
 
     try:
         controller = get_controller(use_mock=use_mock)
         controller.initialize()
 
-        get_db()
+        # Endpoints reach these through app.state instead of the getters.
+        application.state.controller = controller
+        application.state.db = get_db()
 
         if STOP_BUTTON_ENABLED:
-            monitor_task = asyncio.create_task(stop_button_monitor())
-            tasks.append(monitor_task)
+            stop_fd = controller.stop_button_event_fd()
+            if stop_fd is not None:
+                asyncio.get_running_loop().add_reader(stop_fd, _on_stop_edge, controller)
+                logger.info("STOP button monitor started (edge events)")
+            else:
+                monitor_task = asyncio.create_task(stop_button_monitor())
+                tasks.append(monitor_task)
 
         scheduler_task = asyncio.create_task(alarm_scheduler())
         tasks.append(scheduler_task)
@@ -282,6 +458,9 @@ async def lifespan(_app: FastAPI):
 
     logger.info("Kalembang shutting down...")
 
+    if stop_fd is not None:
+        asyncio.get_running_loop().remove_reader(stop_fd)
+
     for task in tasks:
         task.cancel()
         try:
@@ -346,78 +525,81 @@ def _clear_all_active_alarms() -> None:
     _active_alarms.clear()
 
 
+async def _get_controller_dep(request: Request) -> MotorController:
+    return request.app.state.controller
+
+
+async def _get_db_dep(request: Request) -> Database:
+    return request.app.state.db
+
+
+ControllerDep = Annotated[MotorController, Depends(_get_controller_dep)]
+DatabaseDep = Annotated[Database, Depends(_get_db_dep)]
+
+
 @app.get("/api/v1/status", response_model=StatusResponse)
-async def get_status():
+async def get_status(controller: ControllerDep):
     """Get current status of all clocks and controls."""
-    controller = get_controller()
     status = controller.get_status()
     status["active_alarms"] = list(_active_alarms.values())
     return status
 
 
 @app.post("/api/v1/clock/1/on", response_model=MessageResponse)
-async def clock1_on():
+async def clock1_on(controller: ControllerDep):
     """Turn on Clock 1."""
-    controller = get_controller()
     controller.clock1_on()
     return MessageResponse(message="Clock 1 is ON")
 
 
 @app.post("/api/v1/clock/1/off", response_model=MessageResponse)
-async def clock1_off():
+async def clock1_off(controller: ControllerDep):
     """Turn off Clock 1."""
-    controller = get_controller()
     controller.clock1_off()
     _clear_active_alarms_for_clock(1)
     return MessageResponse(message="Clock 1 is OFF")
 
 
 @app.post("/api/v1/clock/2/on", response_model=MessageResponse)
-async def clock2_on():
+async def clock2_on(controller: ControllerDep):
     """Turn on Clock 2."""
-    controller = get_controller()
     controller.clock2_on()
     return MessageResponse(message="Clock 2 is ON")
 
 
 @app.post("/api/v1/clock/2/off", response_model=MessageResponse)
-async def clock2_off():
+async def clock2_off(controller: ControllerDep):
     """Turn off Clock 2."""
-    controller = get_controller()
     controller.clock2_off()
     _clear_active_alarms_for_clock(2)
     return MessageResponse(message="Clock 2 is OFF")
 
 
 @app.post("/api/v1/clock/all/off", response_model=MessageResponse)
-async def all_off():
+async def all_off(controller: ControllerDep):
     """Turn off all clocks immediately."""
-    controller = get_controller()
     controller.all_off()
     _clear_all_active_alarms()
     return MessageResponse(message="All clocks are OFF")
 
 
 @app.post("/api/v1/clock/1/duty", response_model=MessageResponse)
-async def set_clock1_duty(request: DutyRequest):
+async def set_clock1_duty(request: DutyRequest, controller: ControllerDep):
     """Set duty cycle (0-100) for Clock 1."""
-    controller = get_controller()
     controller.set_clock1_duty(request.duty)
     return MessageResponse(message=f"Clock 1 duty set to {request.duty}%")
 
 
 @app.post("/api/v1/clock/2/duty", response_model=MessageResponse)
-async def set_clock2_duty(request: DutyRequest):
+async def set_clock2_duty(request: DutyRequest, controller: ControllerDep):
     """Set duty cycle (0-100) for Clock 2."""
-    controller = get_controller()
     controller.set_clock2_duty(request.duty)
     return MessageResponse(message=f"Clock 2 duty set to {request.duty}%")
 
 
 @app.post("/api/v1/stop/trigger", response_model=MessageResponse)
-async def trigger_stop():
+async def trigger_stop(controller: ControllerDep):
     """Manually trigger emergency stop (same as pressing STOP button)."""
-    controller = get_controller()
     controller.trigger_stop()
     _clear_all_active_alarms()
     return MessageResponse(message="STOP triggered - all clocks OFF")
@@ -427,21 +609,25 @@ async def trigger_stop():
 async def get_time():
     """Get the current server time."""
     now = datetime.now()
-    day_names = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
     return TimeResponse(
         timestamp=now.isoformat(),
         hour=now.hour,
         minute=now.minute,
         second=now.second,
-        day_of_week=day_names[now.weekday()],
+        day_of_week=_DAY_NAMES[now.weekday()],
     )
 
 
 def _alarm_to_response(alarm: Alarm) -> AlarmResponse:
-    """Convert Alarm dataclass to AlarmResponse."""
+    """
+    Convert Alarm dataclass to AlarmResponse.
+
+    Uses model_construct() because the values come straight from the
+    database and need no validation.
+    """
     if alarm.id is None:
         raise ValueError("Alarm must have an id")
-    return AlarmResponse(
+    return AlarmResponse.model_construct(
         id=alarm.id,
         name=alarm.name,
         hour=alarm.hour,
@@ -459,17 +645,14 @@ def _alarm_to_response(alarm: Alarm) -> AlarmResponse:
 
 
 @app.get("/api/v1/alarms", response_model=list[AlarmResponse])
-async def list_alarms():
+async def list_alarms(db: DatabaseDep):
     """Get all alarms."""
-    db = get_db()
-    alarms = db.get_all_alarms()
-    return [_alarm_to_response(a) for a in alarms]
+    return Response(content=db.get_all_alarms_json(), media_type="application/json")
 
 
 @app.post("/api/v1/alarms", response_model=AlarmResponse)
-async def create_alarm(request: AlarmRequest):
+async def create_alarm(request: AlarmRequest, db: DatabaseDep):
     """Create a new alarm."""
-    db = get_db()
 
     alarm = Alarm(
         id=None,
@@ -486,13 +669,14 @@ async def create_alarm(request: AlarmRequest):
     )
 
     created = db.create_alarm(alarm)
+    _schedule_alarm(created, datetime.now())
+    _request_reload()
     return _alarm_to_response(created)
 
 
 @app.get("/api/v1/alarms/{alarm_id}", response_model=AlarmResponse)
-async def get_alarm(alarm_id: int):
+async def get_alarm(alarm_id: int, db: DatabaseDep):
     """Get an alarm by ID."""
-    db = get_db()
     alarm = db.get_alarm(alarm_id)
 
     if not alarm:
@@ -502,9 +686,8 @@ async def get_alarm(alarm_id: int):
 
 
 @app.put("/api/v1/alarms/{alarm_id}", response_model=AlarmResponse)
-async def update_alarm(alarm_id: int, request: AlarmRequest):
+async def update_alarm(alarm_id: int, request: AlarmRequest, db: DatabaseDep):
     """Update an existing alarm."""
-    db = get_db()
 
     existing = db.get_alarm(alarm_id)
     if not existing:
@@ -529,30 +712,34 @@ async def update_alarm(alarm_id: int, request: AlarmRequest):
     updated = db.update_alarm(alarm)
     if updated is None:
         raise HTTPException(status_code=500, detail="Failed to update alarm")
+    _schedule_alarm(updated, datetime.now())
+    _request_reload()
     return _alarm_to_response(updated)
 
 
 @app.delete("/api/v1/alarms/{alarm_id}", response_model=MessageResponse)
-async def delete_alarm(alarm_id: int):
+async def delete_alarm(alarm_id: int, db: DatabaseDep):
     """Delete an alarm."""
-    db = get_db()
 
     deleted = db.delete_alarm(alarm_id)
     if not deleted:
         raise HTTPException(status_code=404, detail="Alarm not found")
 
+    _unschedule_alarm(alarm_id)
+    _request_reload()
     return MessageResponse(message=f"Alarm {alarm_id} deleted")
 
 
 @app.patch("/api/v1/alarms/{alarm_id}/toggle", response_model=AlarmResponse)
-async def toggle_alarm(alarm_id: int, enabled: bool):
+async def toggle_alarm(alarm_id: int, enabled: bool, db: DatabaseDep):
     """Enable or disable an alarm."""
-    db = get_db()
 
     alarm = db.toggle_alarm(alarm_id, enabled)
     if alarm is None:
         raise HTTPException(status_code=404, detail="Alarm not found")
 
+    _schedule_alarm(alarm, datetime.now())
+    _request_reload()
     return _alarm_to_response(alarm)
 
 
@@ -613,9 +800,8 @@ async def get_preset(pattern_id: str):
 
 
 @app.post("/api/v1/patterns/test", response_model=MessageResponse)
-async def test_pattern(request: PatternTestRequest):
+async def test_pattern(request: PatternTestRequest, controller: ControllerDep):
     """Test play a pattern immediately."""
-    controller = get_controller()
     player = get_pattern_player(controller)
 
     pattern = Pattern(
@@ -631,9 +817,8 @@ async def test_pattern(request: PatternTestRequest):
 
 
 @app.post("/api/v1/patterns/stop", response_model=MessageResponse)
-async def stop_pattern():
+async def stop_pattern(controller: ControllerDep):
     """Stop any currently playing pattern."""
-    controller = get_controller()
     player = get_pattern_player(controller)
     await player.stop()
     return MessageResponse(message="Pattern stopped")
@@ -647,19 +832,56 @@ async def health():
 
 CLIENT_DIR = Path(__file__).parent.parent.parent / "client-dist"
 
+
+class ImmutableStaticFiles(StaticFiles):
+    """StaticFiles for fingerprinted build assets, which never change in place."""
+
+    def file_response(self, *args, **kwargs) -> Response:
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return response
+
+
 if CLIENT_DIR.exists():
-    app.mount("/assets", StaticFiles(directory=CLIENT_DIR / "assets"), name="assets")
+    app.mount(
+        "/assets", ImmutableStaticFiles(directory=CLIENT_DIR / "assets"), name="assets"
+    )
+
+    # index.html is small and only changes with a new build (and a restart),
+    # so it is held in memory and revalidated by ETag.
+    _INDEX_HTML = (CLIENT_DIR / "index.html").read_bytes()
+    _INDEX_HEADERS = {
+        "ETag": f'"{hashlib.md5(_INDEX_HTML, usedforsecurity=False).hexdigest()}"',
+        "Cache-Control": "no-cache",
+    }
+
+    # client-dist only changes with a new build, so the set of servable files
+    # is listed once instead of stat()ing every requested path. index.html
+    # is left out so it is always served from memory.
+    _CLIENT_FILES = frozenset(
+        p.relative_to(CLIENT_DIR).as_posix()
+        for p in CLIENT_DIR.rglob("*")
+        if p.is_file()
+    ) - {"index.html"}
 
     @app.get("/{path:path}")
-    async def serve_spa(_request: Request, path: str):
+    async def serve_spa(request: Request, path: str):
         """Serve the SPA for all non-API routes."""
-        file_path = CLIENT_DIR / path
-        if file_path.exists() and file_path.is_file():
-            return FileResponse(file_path)
-        return FileResponse(CLIENT_DIR / "index.html")
+        if path in _CLIENT_FILES:
+            return FileResponse(CLIENT_DIR / path)
+        if request.headers.get("if-none-match") == _INDEX_HEADERS["ETag"]:
+            return Response(status_code=304, headers=_INDEX_HEADERS)
+        return Response(_INDEX_HTML, media_type="text/html", headers=_INDEX_HEADERS)
 
 
 if __name__ == "__main__":
     import uvicorn
 
-    uvicorn.run(app, host=API_HOST, port=API_PORT)
+    try:
+        import uvloop  # noqa: F401
+
+        loop = "uvloop"
+    except ImportError:
+        loop = "asyncio"
+
+    uvicorn.run(app, host=API_HOST, port=API_PORT, loop=loop)
@@ -222,7 +222,7 @@ class PatternPlayer:
             await self.stop()
 
         self._running = True
-        logger.info(f"Starting pattern: {pattern.name} ({len(pattern.events)} events)")
+        logger.info("Starting pattern: %s (%d events)", pattern.name, len(pattern.events))
 
         try:
             for event in pattern.events:
@@ -238,7 +238,7 @@ class PatternPlayer:
         finally:
             self._running = False
             self._tasks.clear()
-            logger.info(f"Pattern finished: {pattern.name}")
+            logger.info("Pattern finished: %s", pattern.name)
 
     async def play_json(self, pattern_json: str) -> None:
         pattern = Pattern.from_json(pattern_json)
@@ -254,7 +254,7 @@ class PatternPlayer:
         duty = event["duty"]
         duration = event["duration"]
 
-        logger.debug(f"Event: clock={clock_id}, duty={duty}%, duration={duration}s")
+        logger.debug("Event: clock=%d, duty=%d%%, duration=%ss", clock_id, duty, duration)
 
         try:
             if clock_id == 1:
@@ -270,7 +270,7 @@ class PatternPlayer:
                 if self._running:
                     self._controller.clock2_off()
         except Exception as e:
-            logger.error(f"Error executing pattern event: {e}")
+            logger.error("Error executing pattern event: %s", e)
 
     async def stop(self) -> None:
         logger.info("Stopping pattern playback")
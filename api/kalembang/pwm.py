@@ -1,25 +1,91 @@
 """
-Kalembang Software PWM
+Kalembang PWM
 
-Provides software-based PWM control for motor "volume" adjustment.
-This is optional for MVP - can be implemented later.
+Provides PWM control for motor "volume" adjustment: software PWM by
+default, or the SoC's sysfs hardware PWM for pins listed in
+HARDWARE_PWM_CHANNELS.
 
 Note: Software PWM has limitations:
 - Not as precise as hardware PWM
-- Can have timing jitter under load
+- Jitter depends on kernel scheduling; run with CAP_SYS_NICE so the PWM
+  thread gets SCHED_FIFO
 - Recommended frequency: 200-1000 Hz
 """
 
-import asyncio
+import ctypes
+import errno
 import logging
-from typing import Optional, Callable
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Callable, Union
 
 logger = logging.getLogger(__name__)
 
 WriteFunc = Callable[[int, int], None]
 
+# Priority requested for PWM threads; best-effort, needs CAP_SYS_NICE.
+PWM_THREAD_PRIORITY = 20
+
+_TIMER_ABSTIME = 1
+
+
+class _Timespec(ctypes.Structure):
+    _fields_ = [("tv_sec", ctypes.c_long), ("tv_nsec", ctypes.c_long)]
+
+
+try:
+    _clock_nanosleep = ctypes.CDLL(None, use_errno=True).clock_nanosleep
+    _clock_nanosleep.argtypes = [
+        ctypes.c_int,
+        ctypes.c_int,
+        ctypes.POINTER(_Timespec),
+        ctypes.POINTER(_Timespec),
+    ]
+except (OSError, AttributeError):
+    _clock_nanosleep = None
+
+_realtime_warned = False
+
+
+def _sleep_until(deadline_ns: int) -> None:
+    """Sleep until an absolute CLOCK_MONOTONIC deadline in nanoseconds."""
+    if _clock_nanosleep is not None:
+        ts = _Timespec(deadline_ns // 1_000_000_000, deadline_ns % 1_000_000_000)
+        while (
+            _clock_nanosleep(time.CLOCK_MONOTONIC, _TIMER_ABSTIME, ctypes.byref(ts), None)
+            == errno.EINTR
+        ):
+            pass
+    else:
+        delay = (deadline_ns - time.monotonic_ns()) / 1_000_000_000
+        if delay > 0:
+            time.sleep(delay)
+
+
+def _set_realtime_priority() -> None:
+    """Move the calling thread to SCHED_FIFO, warning once if not permitted."""
+    global _realtime_warned
+    try:
+        os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(PWM_THREAD_PRIORITY))
+    except (AttributeError, OSError) as e:
+        if not _realtime_warned:
+            _realtime_warned = True
+            logger.warning("PWM thread running without SCHED_FIFO: %s", e)
+
 
 class SoftwarePWM:
+    """
+    PWM generated by toggling a pin from a dedicated thread.
+
+    The thread sleeps to absolute CLOCK_MONOTONIC deadlines with
+    clock_nanosleep(TIMER_ABSTIME), so lateness never accumulates into
+    frequency drift, and asks for SCHED_FIFO so event-loop load does not
+    add jitter. `write_func` is called from that thread.
+    """
+
+    hardware = False
 
     def __init__(
         self,
@@ -31,70 +97,180 @@ class SoftwarePWM:
         self.write: WriteFunc = write_func
         self.frequency = frequency
         self.duty = 0
-        self._running = False
-        self._task: Optional[asyncio.Task[None]] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        # Set by set_duty() and stop() to wake a thread idling at 0% or 100%.
+        self._duty_changed = threading.Event()
 
     @property
     def period(self) -> float:
         """PWM period in seconds."""
         return 1.0 / self.frequency
 
-    async def _pwm_loop(self) -> None:
-        """Main PWM loop - toggles pin based on duty cycle."""
-        period = self.period
-        
-        while self._running:
-            if self.duty <= 0:
-                self.write(self.pin, 0)
-                await asyncio.sleep(period)
-            elif self.duty >= 100:
-                self.write(self.pin, 1)
-                await asyncio.sleep(period)
-            else:
-                on_time = period * (self.duty / 100.0)
-                off_time = period - on_time
-                
-                self.write(self.pin, 1)
-                await asyncio.sleep(on_time)
-                
-                if self._running:  # Check again after sleep
-                    self.write(self.pin, 0)
-                    await asyncio.sleep(off_time)
+    def _run(self) -> None:
+        _set_realtime_priority()
+        next_edge = time.monotonic_ns()
+
+        while not self._stop_event.is_set():
+            period_ns = 1_000_000_000 // self.frequency
+            duty = self.duty
+            if not 0 < duty < 100:
+                # A steady level needs no edges; sleep until something changes.
+                self.write(self.pin, 1 if duty >= 100 else 0)
+                self._duty_changed.clear()
+                if self.duty == duty and not self._stop_event.is_set():
+                    self._duty_changed.wait()
+                next_edge = time.monotonic_ns()
+                continue
+
+            self.write(self.pin, 1)
+            _sleep_until(next_edge + period_ns * duty // 100)
+            self.write(self.pin, 0)
+
+            next_edge += period_ns
+            now = time.monotonic_ns()
+            if now - next_edge > period_ns:
+                # More than a period behind; re-anchor instead of bursting.
+                next_edge = now
+            _sleep_until(next_edge)
 
     @property
     def is_running(self) -> bool:
-        return self._running
+        return self._thread is not None
 
     def start(self) -> None:
-        if self._running:
+        if self._thread is not None:
             return
-        
-        self._running = True
-        self._task = asyncio.create_task(self._pwm_loop())
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name=f"pwm-{self.pin}", daemon=True
+        )
+        self._thread.start()
         logger.debug("PWM started on pin %d at %dHz", self.pin, self.frequency)
 
     def stop(self) -> None:
-        self._running = False
-        if self._task:
-            self._task.cancel()
-            self._task = None
+        if self._thread is not None:
+            self._stop_event.set()
+            self._duty_changed.set()
+            self._thread.join(timeout=1.0)
+            self._thread = None
         self.write(self.pin, 0)
         logger.debug("PWM stopped on pin %d", self.pin)
 
     def set_duty(self, duty: int) -> None:
         self.duty = max(0, min(100, duty))
+        self._duty_changed.set()
         logger.debug("PWM pin %d duty set to %d%%", self.pin, self.duty)
 
     def set_frequency(self, frequency: int) -> None:
         self.frequency = max(1, min(10000, frequency))
         logger.debug("PWM pin %d frequency set to %dHz", self.pin, self.frequency)
 
+
+class HardwarePWM:
+    """
+    PWM generated by a SoC PWM block through the sysfs interface.
+
+    The kernel produces the waveform, so the files under
+    /sys/class/pwm/pwmchipN/pwmM are only written when the duty cycle,
+    frequency or enable state changes.
+    """
+
+    hardware = True
+    SYSFS_ROOT = Path("/sys/class/pwm")
+
+    def __init__(self, pin: int, chip: int, channel: int, frequency: int = 500):
+        self.pin = pin
+        self.frequency = max(1, min(10000, frequency))
+        self.duty = 0
+        self._running = False
+
+        chip_path = self.SYSFS_ROOT / f"pwmchip{chip}"
+        self._path = chip_path / f"pwm{channel}"
+        if not self._path.exists():
+            (chip_path / "export").write_text(str(channel))
+        self._write("enable", 0)
+        self._write("duty_cycle", 0)
+        self._write("period", self.period_ns)
+
+    def _write(self, attr: str, value: int) -> None:
+        (self._path / attr).write_text(str(value))
+
+    @property
+    def period_ns(self) -> int:
+        return 1_000_000_000 // self.frequency
+
+    @property
+    def is_running(self) -> bool:
+        return self._running
+
+    def start(self) -> None:
+        if self._running:
+            return
+        self._write("duty_cycle", self.period_ns * self.duty // 100)
+        self._write("enable", 1)
+        self._running = True
+        logger.debug("Hardware PWM started on pin %d at %dHz", self.pin, self.frequency)
+
+    def stop(self) -> None:
+        self._write("enable", 0)
+        self._running = False
+        logger.debug("Hardware PWM stopped on pin %d", self.pin)
+
+    def set_duty(self, duty: int) -> None:
+        self.duty = max(0, min(100, duty))
+        self._write("duty_cycle", self.period_ns * self.duty // 100)
+        logger.debug("Hardware PWM pin %d duty set to %d%%", self.pin, self.duty)
+
+    def set_frequency(self, frequency: int) -> None:
+        self.frequency = max(1, min(10000, frequency))
+        # duty_cycle may never exceed period, so clear it before shrinking.
+        self._write("duty_cycle", 0)
+        self._write("period", self.period_ns)
+        self._write("duty_cycle", self.period_ns * self.duty // 100)
+        logger.debug("Hardware PWM pin %d frequency set to %dHz", self.pin, self.frequency)
+
+
+PWM = Union[SoftwarePWM, HardwarePWM]
+
+
+def create_pwm(
+    pin: int,
+    write_func: WriteFunc,
+    frequency: int = 500,
+    channel: Optional[tuple[int, int]] = None,
+) -> PWM:
+    """
+    Create a hardware PWM when a (chip, channel) is given, else software PWM.
+
+    Falls back to software PWM if the sysfs channel cannot be set up.
+    """
+    if channel is not None:
+        chip, index = channel
+        try:
+            return HardwarePWM(pin, chip, index, frequency)
+        except OSError as e:
+            logger.warning(
+                "Hardware PWM pwmchip%d/pwm%d unavailable for pin %d (%s) - "
+                "using software PWM",
+                chip, index, pin, e,
+            )
+    return SoftwarePWM(pin, write_func, frequency)
+
+
 class PWMManager:
 
-    def __init__(self, write_func: WriteFunc, default_frequency: int = 500):
+    def __init__(
+        self,
+        write_func: WriteFunc,
+        default_frequency: int = 500,
+        hardware_channels: Optional[dict[int, tuple[int, int]]] = None,
+    ):
         self.write_func: WriteFunc = write_func
         self.default_frequency = default_frequency
-        self._channels: dict[str, SoftwarePWM] = {}
+        self.hardware_channels = hardware_channels or {}
+        self._channels: dict[str, PWM] = {}
 
     def add_channel(
         self,
@@ -111,7 +287,9 @@ class PWMManager:
             frequency: PWM frequency (uses default if None)
         """
         freq = frequency or self.default_frequency
-        self._channels[name] = SoftwarePWM(pin, self.write_func, freq)
+        self._channels[name] = create_pwm(
+            pin, self.write_func, freq, self.hardware_channels.get(pin)
+        )
         logger.info("PWM channel '%s' added on pin %d", name, pin)
 
     def start_all(self) -> None: